@@ -2,20 +2,37 @@
 V-Face Matching Service — Cryptography Utilities
 
 Handles AES-256-GCM decryption of embeddings received from the Node.js API.
-Supports versioned payloads: 'v{n}:iv:authTag:ciphertext'
+Supports versioned payloads: 'v{n}:iv:authTag:ciphertext' (JSON plaintext)
+and the binary v2 frame: b'v2' | key_version (u8) | iv (12) | authTag (16) | ciphertext
+(raw little-endian float32 plaintext)
 """
 
 import os
+import re
 import json
+import math
 import ctypes
 import logging
+from binascii import unhexlify
+from functools import lru_cache
+
+import numpy as np
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 logger = logging.getLogger("matching.crypto")
 
+# Binary v2 frame layout (transported base64-encoded)
+FRAME_MAGIC = b"v2"
+FRAME_IV_LEN = 12
+FRAME_TAG_LEN = 16
+_FRAME_IV_START = len(FRAME_MAGIC) + 1
+_FRAME_TAG_START = _FRAME_IV_START + FRAME_IV_LEN
+_FRAME_CT_START = _FRAME_TAG_START + FRAME_TAG_LEN
+
 
+@lru_cache(maxsize=8)
 def _get_key(version: int = 1) -> bytes:
-    """Resolve encryption key by version."""
+    """Resolve encryption key by version (cached — rotating keys requires a restart)."""
     versioned = os.getenv(f"VFACE_ENCRYPTION_KEY_V{version}")
     if versioned:
         return bytes.fromhex(versioned)
@@ -27,47 +44,120 @@ def _get_key(version: int = 1) -> bytes:
     raise ValueError(f"No encryption key found for version {version}")
 
 
-def decrypt_embedding(encrypted_payload: str) -> list[float]:
+@lru_cache(maxsize=8)
+def _gcm_for_version(version: int) -> AESGCM:
+    """Return a shared AESGCM per key version — its keyed context (round keys, GHASH tables) is reused."""
+    return AESGCM(_get_key(version))
+
+
+def warm_ciphers() -> list[int]:
+    """Key the AESGCM context for every configured key version up front."""
+    versions = {1} if os.getenv("VFACE_ENCRYPTION_KEY") else set()
+    for name in os.environ:
+        match = re.fullmatch(r"VFACE_ENCRYPTION_KEY_V(\d+)", name)
+        if match:
+            versions.add(int(match.group(1)))
+
+    for version in versions:
+        _gcm_for_version(version)
+    return sorted(versions)
+
+
+def _parse_frame(frame: bytes) -> tuple[int, bytes, bytes, bytes]:
+    """Split a binary v2 frame into (version, iv, tag, ciphertext)."""
+    if len(frame) <= _FRAME_CT_START or frame[:len(FRAME_MAGIC)] != FRAME_MAGIC:
+        raise ValueError("Unknown payload format: not a v2 frame")
+
+    buf = memoryview(frame)
+    return (
+        frame[len(FRAME_MAGIC)],
+        buf[_FRAME_IV_START:_FRAME_TAG_START],
+        buf[_FRAME_TAG_START:_FRAME_CT_START],
+        buf[_FRAME_CT_START:],
+    )
+
+
+def _parse_hex(encrypted_payload: str) -> tuple[int, bytes, bytes, bytes]:
+    """Split a hex 'v{n}:iv:tag:ct' / 'iv:tag:ct' payload into (version, iv, tag, ciphertext)."""
+    # Locate separators by offset instead of split() — no intermediate list of substrings
+    o1 = encrypted_payload.find(":")
+    o2 = encrypted_payload.find(":", o1 + 1) if o1 >= 0 else -1
+    o3 = encrypted_payload.find(":", o2 + 1) if o2 >= 0 else -1
+
+    if o3 >= 0 and encrypted_payload.startswith("v") and encrypted_payload.find(":", o3 + 1) < 0:
+        version = int(encrypted_payload[1:o1])
+        iv_start = o1 + 1
+        tag_start, ct_start = o2 + 1, o3 + 1
+    elif o2 >= 0 and o3 < 0:
+        version = 1
+        iv_start = 0
+        tag_start, ct_start = o1 + 1, o2 + 1
+    else:
+        raise ValueError(f"Unknown payload format: {encrypted_payload.count(':') + 1} parts")
+
+    return (
+        version,
+        unhexlify(encrypted_payload[iv_start:tag_start - 1]),
+        unhexlify(encrypted_payload[tag_start:ct_start - 1]),
+        unhexlify(encrypted_payload[ct_start:]),
+    )
+
+
+def decrypt_embedding(encrypted_payload: str | bytes) -> np.ndarray:
     """
     Decrypt an AES-256-GCM encrypted embedding.
     
-    Supports two formats:
+    Supports three formats:
+      - Binary v2: raw frame bytes (see module docstring)
       - Versioned: 'v{n}:iv_hex:authTag_hex:ciphertext_hex'
       - Legacy:    'iv_hex:authTag_hex:ciphertext_hex'
     
-    Returns a list of floats (the embedding vector).
+    Returns the embedding as a float32 array.
     """
-    parts = encrypted_payload.split(":")
-
-    if parts[0].startswith("v") and len(parts) == 4:
-        version = int(parts[0][1:])
-        iv_hex, tag_hex, ct_hex = parts[1], parts[2], parts[3]
-    elif len(parts) == 3:
-        version = 1
-        iv_hex, tag_hex, ct_hex = parts[0], parts[1], parts[2]
+    binary = isinstance(encrypted_payload, (bytes, bytearray))
+    if binary:
+        version, iv, tag, ciphertext = _parse_frame(encrypted_payload)
     else:
-        raise ValueError(f"Unknown payload format: {len(parts)} parts")
+        version, iv, tag, ciphertext = _parse_hex(encrypted_payload)
 
-    key = _get_key(version)
-    iv = bytes.fromhex(iv_hex)
-    tag = bytes.fromhex(tag_hex)
-    ciphertext = bytes.fromhex(ct_hex)
+    # AES-GCM: ciphertext + tag are concatenated for decryption.
+    # Hold the plaintext in a mutable buffer so it can actually be zeroed.
+    aesgcm = _gcm_for_version(version)
+    plaintext = bytearray(aesgcm.decrypt(iv, bytes(ciphertext) + tag, None))
 
-    # AES-GCM: ciphertext + tag are concatenated for decryption
-    aesgcm = AESGCM(key)
-    plaintext = aesgcm.decrypt(iv, ciphertext + tag, None)
+    try:
+        if binary:
+            # Copy so the array does not alias the plaintext we are about to zero
+            embedding = np.frombuffer(plaintext, dtype="<f4").astype(np.float32)
+        else:
+            embedding = np.asarray(json.loads(plaintext), dtype=np.float32)
+    finally:
+        # Securely zero the plaintext bytes — also when parsing fails
+        secure_zero(plaintext)
 
-    embedding = json.loads(plaintext.decode("utf-8"))
+    return embedding
 
-    # Securely zero the plaintext bytes
-    secure_zero(plaintext)
 
-    return embedding
+def l2_normalize(vec: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize a float32 vector in place and return it.
+
+    One BLAS dot for the squared norm, then a single in-place scale by its
+    reciprocal square root — no intermediate arrays, and the decrypted buffer
+    is overwritten rather than copied.
+    """
+    sq = float(np.dot(vec, vec))
+    if sq > 0:
+        vec *= np.float32(1.0 / math.sqrt(sq))
+    return vec
 
 
-def secure_zero(data: bytes):
-    """Best-effort secure memory zeroing."""
-    try:
-        ctypes.memset(id(data) + bytes.__basicsize__, 0, len(data))
-    except Exception:
-        pass  # Not critical — Python GC will handle it
+def secure_zero(data: bytearray):
+    """
+    Zero a mutable buffer in place.
+
+    Only writable buffers can be wiped safely — immutable bytes would need
+    pointer arithmetic into the CPython object header, so they are rejected.
+    """
+    if data:
+        ctypes.memset((ctypes.c_char * len(data)).from_buffer(data), 0, len(data))
@@ -12,16 +12,20 @@ Endpoints:
 """
 
 import os
+import re
 import time
+import asyncio
 import logging
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 from fastapi import FastAPI, HTTPException, Header
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Base64Bytes
 
-from sqlite_vec_store import get_client, ensure_collection, upsert_embedding, search_similar, delete_vector, get_collection_info, get_embedding
-from crypto_utils import decrypt_embedding
+from sqlite_vec_store import get_client, ensure_collection, upsert_embedding, search_similar, has_similar, delete_vector, get_collection_info, get_embedding
+from crypto_utils import decrypt_embedding, l2_normalize, warm_ciphers
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
 logger = logging.getLogger("matching")
@@ -30,21 +34,29 @@ MATCHING_SECRET = os.getenv("MATCHING_SECRET", "dev-secret-change-me")
 SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.85"))
 REFRESH_THRESHOLD = float(os.getenv("REFRESH_THRESHOLD", "0.70"))  # Lower threshold for drift refresh
 DP_SIGMA = float(os.getenv("DP_SIGMA", "0.0"))  # Differential privacy noise (0 = disabled)
+CRYPTO_WORKERS = int(os.getenv("CRYPTO_WORKERS", str(os.cpu_count() or 1)))
 
 # Global vector store connection
 db = None
 
+# Decrypt + normalize runs here so it never blocks the event loop.
+# OpenSSL releases the GIL during AES-GCM, so workers decrypt in parallel.
+crypto_pool = None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize sqlite-vec store on startup."""
-    global db
+    """Initialize sqlite-vec store and crypto pool on startup."""
+    global db, crypto_pool
+    crypto_pool = ThreadPoolExecutor(max_workers=CRYPTO_WORKERS, thread_name_prefix="crypto")
     db = get_client()
     ensure_collection(db)
-    logger.info("Matching Service ready (sqlite-vec)")
+    versions = warm_ciphers()
+    logger.info(f"Matching Service ready (sqlite-vec, key versions: {versions})")
 
     yield
 
+    crypto_pool.shutdown(wait=False)
     if db:
         db.close()
     logger.info("Matching Service shutting down")
@@ -56,6 +68,7 @@ app = FastAPI(
     docs_url=None,   # No public Swagger
     redoc_url=None,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Include anomaly detection router
@@ -77,13 +90,23 @@ def verify_secret(x_matching_secret: str = Header(None)):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
 
+_FINGERPRINT_RE = re.compile(r"[0-9a-f]{64}")
+
+
+def verify_fingerprint(fingerprint: str):
+    """Reject anything that isn't a 64-char lowercase hex fingerprint."""
+    if not _FINGERPRINT_RE.fullmatch(fingerprint):
+        raise HTTPException(status_code=400, detail="Invalid fingerprint: expected 64 hex chars")
+
+
 # ============================================================================
 # Request / Response Models
 # ============================================================================
 
 class EnrollRequest(BaseModel):
     fingerprint: str           # 64-char hex fingerprint
-    encrypted_embedding: str   # AES-256-GCM encrypted payload
+    encrypted_embedding: str | None = None              # AES-256-GCM encrypted payload (hex)
+    encrypted_embedding_b64: Base64Bytes | None = None  # AES-256-GCM binary v2 frame
     user_id: str | None = None
     metadata: dict | None = None
 
@@ -95,7 +118,8 @@ class EnrollResponse(BaseModel):
 
 
 class SearchRequest(BaseModel):
-    encrypted_embedding: str   # AES-256-GCM encrypted query embedding
+    encrypted_embedding: str | None = None              # AES-256-GCM encrypted query embedding (hex)
+    encrypted_embedding_b64: Base64Bytes | None = None  # AES-256-GCM binary v2 frame
     threshold: float | None = None
     top_k: int = 1
 
@@ -112,7 +136,8 @@ class DeleteRequest(BaseModel):
 
 class RefreshRequest(BaseModel):
     fingerprint: str           # Identity to refresh
-    encrypted_embedding: str   # New face capture (encrypted)
+    encrypted_embedding: str | None = None              # New face capture (encrypted, hex)
+    encrypted_embedding_b64: Base64Bytes | None = None  # New face capture (binary v2 frame)
 
 
 class RefreshResponse(BaseModel):
@@ -122,46 +147,61 @@ class RefreshResponse(BaseModel):
     blended: bool              # Whether blending was applied
 
 
+def encrypted_payload(req: EnrollRequest | SearchRequest | RefreshRequest) -> str | bytes:
+    """Pick the encrypted embedding from a request — binary frame preferred over hex."""
+    if req.encrypted_embedding_b64 is not None:
+        return req.encrypted_embedding_b64
+    if req.encrypted_embedding is not None:
+        return req.encrypted_embedding
+    raise HTTPException(400, "encrypted_embedding or encrypted_embedding_b64 is required")
+
+
+def _decrypt_and_normalize(encrypted: str | bytes) -> np.ndarray:
+    return l2_normalize(decrypt_embedding(encrypted))
+
+
+async def decrypt_and_normalize(encrypted: str | bytes) -> np.ndarray:
+    """Decrypt + L2-normalize an embedding on the crypto thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(crypto_pool, _decrypt_and_normalize, encrypted)
+
+
 # ============================================================================
 # Endpoints
 # ============================================================================
 
 @app.post("/enroll", response_model=EnrollResponse)
-def enroll(req: EnrollRequest, x_matching_secret: str = Header(None)):
+async def enroll(req: EnrollRequest, x_matching_secret: str = Header(None)):
     verify_secret(x_matching_secret)
+    verify_fingerprint(req.fingerprint)
+    encrypted = encrypted_payload(req)
 
     try:
-        # 1. Decrypt embedding (only place raw vectors exist)
-        embedding = decrypt_embedding(req.encrypted_embedding)
+        # 1. Decrypt + L2 normalize for cosine similarity (only place raw vectors exist)
+        vec = await decrypt_and_normalize(encrypted)
 
         # 2. Validate dimension
-        if len(embedding) != 128:
-            raise HTTPException(400, f"Expected 128-d, got {len(embedding)}-d")
-
-        # 3. L2 normalize for cosine similarity
-        vec = np.array(embedding, dtype=np.float32)
-        norm = np.linalg.norm(vec)
-        if norm > 0:
-            vec = vec / norm
-
-        # 4. Check for duplicate (Sybil check)
-        duplicates = search_similar(db, vec.tolist(), threshold=SIMILARITY_THRESHOLD, top_k=1)
-        if duplicates:
-            raise HTTPException(
-                409,
-                f"Similar identity already exists (score: {duplicates[0]['score']}, "
-                f"fingerprint: {duplicates[0]['fingerprint'][:8]}...)"
-            )
-
-        # 5. Apply differential privacy noise (if enabled)
+        if len(vec) != 128:
+            raise HTTPException(400, f"Expected 128-d, got {len(vec)}-d")
+
+        # 3. Check for duplicate (Sybil check) — payload is only fetched on a hit
+        if has_similar(db, vec, threshold=SIMILARITY_THRESHOLD):
+            duplicates = search_similar(db, vec, threshold=SIMILARITY_THRESHOLD, top_k=1)
+            detail = "Similar identity already exists"
+            if duplicates:
+                detail += (
+                    f" (score: {duplicates[0]['score']}, "
+                    f"fingerprint: {duplicates[0]['fingerprint'][:8]}...)"
+                )
+            raise HTTPException(409, detail)
+
+        # 4. Apply differential privacy noise (if enabled)
         if DP_SIGMA > 0:
             noise = np.random.normal(0, DP_SIGMA, size=128).astype(np.float32)
-            vec = vec + noise
-            norm = np.linalg.norm(vec)
-            if norm > 0:
-                vec = vec / norm  # Re-normalize after noise
+            vec += noise
+            l2_normalize(vec)  # Re-normalize after noise
 
-        # 6. Store in vector DB
+        # 5. Store in vector DB
         payload = {
             "user_id": req.user_id or req.fingerprint,
             "status": "active",
@@ -170,11 +210,10 @@ def enroll(req: EnrollRequest, x_matching_secret: str = Header(None)):
         if req.metadata:
             payload["metadata"] = req.metadata
 
-        upsert_embedding(db, req.fingerprint, vec.tolist(), payload)
+        upsert_embedding(db, req.fingerprint, vec, payload)
 
         # 6. Zero memory
         vec.fill(0)
-        del embedding
 
         logger.info(f"Enrolled: {req.fingerprint[:8]}...")
         return EnrollResponse(success=True, fingerprint=req.fingerprint, vector_dim=128)
@@ -187,32 +226,27 @@ def enroll(req: EnrollRequest, x_matching_secret: str = Header(None)):
 
 
 @app.post("/search", response_model=SearchResponse)
-def search(req: SearchRequest, x_matching_secret: str = Header(None)):
+async def search(req: SearchRequest, x_matching_secret: str = Header(None)):
     verify_secret(x_matching_secret)
+    encrypted = encrypted_payload(req)
 
     try:
-        start = time.time()
-
-        # 1. Decrypt query embedding
-        embedding = decrypt_embedding(req.encrypted_embedding)
+        start = time.perf_counter_ns()
 
-        # 2. L2 normalize
-        vec = np.array(embedding, dtype=np.float32)
-        norm = np.linalg.norm(vec)
-        if norm > 0:
-            vec = vec / norm
+        # 1. Decrypt + L2 normalize query embedding
+        vec = await decrypt_and_normalize(encrypted)
 
-        # 3. Search vector store
+        # 2. Search vector store
         threshold = req.threshold or SIMILARITY_THRESHOLD
-        results = search_similar(db, vec.tolist(), threshold=threshold, top_k=req.top_k)
+        results = search_similar(db, vec, threshold=threshold, top_k=req.top_k)
 
-        # 4. Zero memory
+        # 3. Zero memory
         vec.fill(0)
-        del embedding
 
-        elapsed = (time.time() - start) * 1000
+        # Monotonic ns clock; integer divide to 10µs, then scale to ms with 2 decimals
+        elapsed_ms = (time.perf_counter_ns() - start) // 10_000 / 100
 
-        # 5. Record verification event for anomaly detection
+        # 4. Record verification event for anomaly detection
         if results:
             for r in results:
                 anomaly_detector.record_event(r.get("fingerprint", "unknown"))
@@ -220,7 +254,7 @@ def search(req: SearchRequest, x_matching_secret: str = Header(None)):
         return SearchResponse(
             matched=len(results) > 0,
             results=results,
-            search_time_ms=round(elapsed, 2),
+            search_time_ms=elapsed_ms,
         )
 
     except Exception as e:
@@ -230,8 +264,9 @@ def search(req: SearchRequest, x_matching_secret: str = Header(None)):
 
 
 @app.post("/delete")
-def delete(req: DeleteRequest, x_matching_secret: str = Header(None)):
+async def delete(req: DeleteRequest, x_matching_secret: str = Header(None)):
     verify_secret(x_matching_secret)
+    verify_fingerprint(req.fingerprint)
 
     try:
         delete_vector(db, req.fingerprint)
@@ -247,27 +282,26 @@ def delete(req: DeleteRequest, x_matching_secret: str = Header(None)):
 # ============================================================================
 
 @app.post("/refresh", response_model=RefreshResponse)
-def refresh(req: RefreshRequest, x_matching_secret: str = Header(None)):
+async def refresh(req: RefreshRequest, x_matching_secret: str = Header(None)):
     """Refresh an aging embedding with a new face capture."""
     verify_secret(x_matching_secret)
+    verify_fingerprint(req.fingerprint)
+    encrypted = encrypted_payload(req)
 
     try:
-        # 1. Get existing embedding
+        # 1. Decrypt new embedding. This is the only await — everything after it
+        #    (read existing → upsert) runs in one step on the loop, so a concurrent
+        #    /delete can't be overwritten with a stale payload.
+        new_vec = await decrypt_and_normalize(encrypted)
+        if len(new_vec) != 128:
+            raise HTTPException(400, f"Expected 128-d, got {len(new_vec)}-d")
+
+        # 2. Get existing embedding
         existing = get_embedding(db, req.fingerprint)
         if not existing:
             raise HTTPException(404, "Identity not found in vector store")
 
-        old_vec = np.array(existing["vector"], dtype=np.float32)
-
-        # 2. Decrypt new embedding
-        new_embedding = decrypt_embedding(req.encrypted_embedding)
-        if len(new_embedding) != 128:
-            raise HTTPException(400, f"Expected 128-d, got {len(new_embedding)}-d")
-
-        new_vec = np.array(new_embedding, dtype=np.float32)
-        norm = np.linalg.norm(new_vec)
-        if norm > 0:
-            new_vec = new_vec / norm
+        old_vec = np.asarray(existing["vector"], dtype=np.float32)
 
         # 3. Check similarity (must be above refresh threshold)
         drift_score = float(np.dot(old_vec, new_vec))
@@ -279,23 +313,19 @@ def refresh(req: RefreshRequest, x_matching_secret: str = Header(None)):
             )
 
         # 4. Blend embeddings: weighted average
-        blended = 0.7 * old_vec + 0.3 * new_vec
-        blended_norm = np.linalg.norm(blended)
-        if blended_norm > 0:
-            blended = blended / blended_norm
+        blended = l2_normalize(0.7 * old_vec + 0.3 * new_vec)
 
         # 5. Update in vector store (preserve existing payload)
         payload = existing.get("payload", {})
         payload["refreshed_at"] = int(time.time())
         payload["drift_score"] = round(drift_score, 4)
 
-        upsert_embedding(db, req.fingerprint, blended.tolist(), payload)
+        upsert_embedding(db, req.fingerprint, blended, payload)
 
         # 6. Zero memory
         old_vec.fill(0)
         new_vec.fill(0)
         blended.fill(0)
-        del new_embedding
 
         logger.info(f"Refreshed: {req.fingerprint[:8]}... (drift: {drift_score:.4f})")
         return RefreshResponse(
@@ -313,7 +343,7 @@ def refresh(req: RefreshRequest, x_matching_secret: str = Header(None)):
 
 
 @app.get("/health")
-def health():
+async def health():
     try:
         info = get_collection_info(db)
         return {
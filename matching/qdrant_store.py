@@ -4,11 +4,15 @@ V-Face Matching Service — Qdrant Vector Database Client
 Manages the 'vface_embeddings' collection:
 - 128-dimensional cosine similarity
 - HNSW index for <10ms search at 10M+ scale
+- int8 scalar quantization in RAM, original float32 vectors on disk
 - Payload filtering by status (active/revoked)
 """
 
 import os
 import logging
+from functools import lru_cache
+
+import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
     Distance,
@@ -18,19 +22,54 @@ from qdrant_client.models import (
     FieldCondition,
     MatchValue,
     PayloadSchemaType,
+    PayloadSelectorInclude,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
 )
 
 logger = logging.getLogger("matching.qdrant")
 
 QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "1") == "1"
 COLLECTION_NAME = os.getenv("COLLECTION_NAME", "vface_embeddings")
 VECTOR_DIM = int(os.getenv("VECTOR_DIM", "128"))
+# Optional lower HNSW ef for the duplicate probe — trades recall (missed duplicates) for latency
+SYBIL_HNSW_EF = int(os.getenv("SYBIL_HNSW_EF", "0")) or None
+
+
+@lru_cache(maxsize=65536)
+def _numeric_id(fingerprint: str) -> int:
+    """
+    Map a hex fingerprint to a stable Qdrant point ID.
+
+    Qdrant uses unsigned integers or UUIDs for point IDs, so we take the
+    first 64 bits of the fingerprint.
+    """
+    return int.from_bytes(bytes.fromhex(fingerprint[:16]), "big")
+
+
+def _as_list(vector: list[float] | np.ndarray) -> list[float]:
+    """PointStruct only accepts plain lists; queries take ndarrays directly."""
+    return vector.tolist() if isinstance(vector, np.ndarray) else vector
 
 
 def get_client() -> QdrantClient:
-    """Create a Qdrant client. Supports both local and Qdrant Cloud (with API key)."""
-    kwargs = {"url": QDRANT_URL, "timeout": 30}
+    """
+    Create a Qdrant client. Supports both local and Qdrant Cloud (with API key).
+
+    Uses gRPC (persistent HTTP/2 channel, protobuf vectors) unless
+    QDRANT_PREFER_GRPC=0, in which case it falls back to REST.
+    """
+    kwargs = {
+        "url": QDRANT_URL,
+        "timeout": 30,
+        "prefer_grpc": QDRANT_PREFER_GRPC,
+        "grpc_port": QDRANT_GRPC_PORT,
+    }
     if QDRANT_API_KEY:
         kwargs["api_key"] = QDRANT_API_KEY
     return QdrantClient(**kwargs)
@@ -46,6 +85,11 @@ def ensure_collection(client: QdrantClient):
                 vectors_config=VectorParams(
                     size=VECTOR_DIM,
                     distance=Distance.COSINE,
+                    on_disk=True,  # Full-precision originals only needed for rescoring
+                ),
+                # int8 copies stay in RAM: 4x less memory, more HNSW candidates per cache line
+                quantization_config=ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True),
                 ),
             )
             # Index on status field for filtered search
@@ -60,7 +104,7 @@ def ensure_collection(client: QdrantClient):
                 field_name="model_version",
                 field_schema=PayloadSchemaType.KEYWORD,
             )
-            logger.info(f"Created collection '{COLLECTION_NAME}' ({VECTOR_DIM}-d, cosine)")
+            logger.info(f"Created collection '{COLLECTION_NAME}' ({VECTOR_DIM}-d, cosine, int8 quantized)")
         except Exception as e:
             if "already exists" in str(e):
                 logger.info(f"Collection '{COLLECTION_NAME}' already exists (race condition handled)")
@@ -73,31 +117,30 @@ def ensure_collection(client: QdrantClient):
 def upsert_embedding(
     client: QdrantClient,
     point_id: str,
-    vector: list[float],
+    vector: list[float] | np.ndarray,
     payload: dict,
     model_version: str = "mobilefacenet_v1",
 ):
-    """Store or update a vector in Qdrant."""
-    # Qdrant uses unsigned integers or UUIDs for point IDs
-    # We hash the fingerprint to a stable integer
-    numeric_id = int.from_bytes(bytes.fromhex(point_id[:16]), "big")
+    """
+    Store or update a vector in Qdrant.
+
+    Note: `payload` is updated in place with `fingerprint` and `model_version`
+    rather than copied.
+    """
+    numeric_id = _numeric_id(point_id)
+    payload["fingerprint"] = point_id
+    payload["model_version"] = model_version
 
     client.upsert(
         collection_name=COLLECTION_NAME,
-        points=[
-            PointStruct(
-                id=numeric_id,
-                vector=vector,
-                payload={**payload, "fingerprint": point_id, "model_version": model_version},
-            )
-        ],
+        points=[PointStruct(id=numeric_id, vector=_as_list(vector), payload=payload)],
     )
     return numeric_id
 
 
 def get_embedding(client: QdrantClient, fingerprint: str) -> dict | None:
     """Retrieve an existing embedding by fingerprint."""
-    numeric_id = int.from_bytes(bytes.fromhex(fingerprint[:16]), "big")
+    numeric_id = _numeric_id(fingerprint)
     try:
         points = client.retrieve(
             collection_name=COLLECTION_NAME,
@@ -109,7 +152,7 @@ def get_embedding(client: QdrantClient, fingerprint: str) -> dict | None:
             return None
         point = points[0]
         return {
-            "vector": point.vector,
+            "vector": np.asarray(point.vector, dtype=np.float32),
             "payload": point.payload,
             "fingerprint": point.payload.get("fingerprint"),
         }
@@ -117,9 +160,27 @@ def get_embedding(client: QdrantClient, fingerprint: str) -> dict | None:
         return None
 
 
+_ACTIVE_FILTER = Filter(
+    must=[FieldCondition(key="status", match=MatchValue(value="active"))]
+)
+# Search results only expose these fields — don't ship the rest of the payload
+_RESULT_PAYLOAD = PayloadSelectorInclude(include=["fingerprint", "user_id"])
+
+
+def _hits_to_results(points) -> list[dict]:
+    return [
+        {
+            "fingerprint": hit.payload.get("fingerprint"),
+            "user_id": hit.payload.get("user_id"),
+            "score": round(hit.score, 4),
+        }
+        for hit in points
+    ]
+
+
 def search_similar(
     client: QdrantClient,
-    query_vector: list[float],
+    query_vector: list[float] | np.ndarray,
     threshold: float = 0.85,
     top_k: int = 1,
 ) -> list[dict]:
@@ -127,27 +188,36 @@ def search_similar(
     results = client.query_points(
         collection_name=COLLECTION_NAME,
         query=query_vector,
-        query_filter=Filter(
-            must=[FieldCondition(key="status", match=MatchValue(value="active"))]
-        ),
+        query_filter=_ACTIVE_FILTER,
         limit=top_k,
         score_threshold=threshold,
-        with_payload=True,
+        with_payload=_RESULT_PAYLOAD,
     )
 
-    return [
-        {
-            "fingerprint": hit.payload.get("fingerprint"),
-            "user_id": hit.payload.get("user_id"),
-            "score": round(hit.score, 4),
-        }
-        for hit in results.points
-    ]
+    return _hits_to_results(results.points)
+
+
+def has_similar(
+    client: QdrantClient,
+    query_vector: list[float] | np.ndarray,
+    threshold: float = 0.85,
+) -> bool:
+    """Check whether any active vector scores >= threshold — single hit, no payload."""
+    results = client.query_points(
+        collection_name=COLLECTION_NAME,
+        query=query_vector,
+        query_filter=_ACTIVE_FILTER,
+        limit=1,
+        score_threshold=threshold,
+        with_payload=False,
+        search_params=SearchParams(hnsw_ef=SYBIL_HNSW_EF),
+    )
+    return bool(results.points)
 
 
 def delete_vector(client: QdrantClient, fingerprint: str):
     """Remove a vector (revocation) — set status to revoked."""
-    numeric_id = int.from_bytes(bytes.fromhex(fingerprint[:16]), "big")
+    numeric_id = _numeric_id(fingerprint)
     client.set_payload(
         collection_name=COLLECTION_NAME,
         payload={"status": "revoked"},
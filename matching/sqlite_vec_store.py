@@ -15,6 +15,8 @@ import json
 import struct
 import logging
 
+import numpy as np
+
 # Try pysqlite3 first (compiled with extension loading support), fall back to stdlib
 try:
     import pysqlite3 as sqlite3
@@ -30,15 +32,16 @@ COLLECTION_NAME = os.getenv("COLLECTION_NAME", "vface_embeddings")
 VECTOR_DIM = int(os.getenv("VECTOR_DIM", "128"))
 
 
-def _serialize_f32(vector: list[float]) -> bytes:
-    """Serialize a list of floats into compact raw bytes for sqlite-vec."""
+def _serialize_f32(vector: list[float] | np.ndarray) -> bytes:
+    """Serialize a vector into compact raw float32 bytes for sqlite-vec."""
+    if isinstance(vector, np.ndarray):
+        return vector.astype(np.float32, copy=False).tobytes()
     return struct.pack("%sf" % len(vector), *vector)
 
 
-def _deserialize_f32(blob: bytes) -> list[float]:
-    """Deserialize raw bytes back into a list of floats."""
-    n = len(blob) // 4
-    return list(struct.unpack("%sf" % n, blob))
+def _deserialize_f32(blob: bytes) -> np.ndarray:
+    """Deserialize raw bytes back into a float32 array (copied, so it is writable)."""
+    return np.frombuffer(blob, dtype=np.float32).copy()
 
 
 def get_client() -> sqlite3.Connection:
@@ -106,7 +109,7 @@ def ensure_collection(client: sqlite3.Connection):
 def upsert_embedding(
     client: sqlite3.Connection,
     point_id: str,
-    vector: list[float],
+    vector: list[float] | np.ndarray,
     payload: dict,
     model_version: str = "mobilefacenet_v1",
 ):
@@ -171,55 +174,64 @@ def get_embedding(client: sqlite3.Connection, fingerprint: str) -> dict | None:
 
 def search_similar(
     client: sqlite3.Connection,
-    query_vector: list[float],
+    query_vector: list[float] | np.ndarray,
     threshold: float = 0.85,
     top_k: int = 1,
 ) -> list[dict]:
     """Search for similar vectors among active identities using cosine distance."""
-    # KNN search via vec0 with metadata filter on status
+    query_blob = _serialize_f32(query_vector)
+
+    # KNN search via vec0 with metadata filter on status. vec0 MATCH ranks by
+    # L2 distance, so cosine similarity and user_id are resolved for the
+    # candidates in the same statement instead of per-hit follow-up queries.
+    # Fetch extra candidates since we'll filter by threshold.
     rows = client.execute(f"""
+        WITH knn AS (
+            SELECT fingerprint, embedding
+            FROM {COLLECTION_NAME}_vec
+            WHERE embedding MATCH ?
+              AND k = ?
+              AND status = 'active'
+        )
         SELECT
-            v.fingerprint,
-            v.distance
-        FROM {COLLECTION_NAME}_vec v
-        WHERE v.embedding MATCH ?
-          AND v.k = ?
-          AND v.status = 'active'
-    """, (_serialize_f32(query_vector), top_k * 5)).fetchall()
-    # Fetch extra candidates since we'll filter by threshold
-
-    results = []
-    for row in rows:
-        # vec0 MATCH returns L2 distance by default — compute cosine similarity manually
-        cosine_dist = client.execute(
-            "SELECT vec_distance_cosine(?, ?)",
-            (_serialize_f32(query_vector), client.execute(
-                f"SELECT embedding FROM {COLLECTION_NAME}_vec WHERE fingerprint = ?",
-                (row["fingerprint"],)
-            ).fetchone()["embedding"])
-        ).fetchone()[0]
-
-        # cosine_distance ranges [0, 2]; similarity = 1 - distance
-        similarity = 1.0 - cosine_dist
-
-        if similarity >= threshold:
-            # Get user_id from payload table
-            payload_row = client.execute(f"""
-                SELECT user_id FROM {COLLECTION_NAME}_payload WHERE fingerprint = ?
-            """, (row["fingerprint"],)).fetchone()
-
-            results.append({
-                "fingerprint": row["fingerprint"],
-                "user_id": payload_row["user_id"] if payload_row else None,
-                "score": round(similarity, 4),
-            })
-
-        if len(results) >= top_k:
-            break
+            knn.fingerprint,
+            1.0 - vec_distance_cosine(knn.embedding, ?) AS similarity,
+            p.user_id
+        FROM knn
+        LEFT JOIN {COLLECTION_NAME}_payload p ON p.fingerprint = knn.fingerprint
+        ORDER BY similarity DESC
+    """, (query_blob, top_k * 5, query_blob)).fetchall()
+
+    return [
+        {
+            "fingerprint": row["fingerprint"],
+            "user_id": row["user_id"],
+            "score": round(row["similarity"], 4),
+        }
+        for row in rows
+        if row["similarity"] >= threshold
+    ][:top_k]
+
+
+def has_similar(
+    client: sqlite3.Connection,
+    query_vector: list[float] | np.ndarray,
+    threshold: float = 0.85,
+) -> bool:
+    """Check whether any active vector scores >= threshold — nearest neighbour only, no payload."""
+    query_blob = _serialize_f32(query_vector)
+    row = client.execute(f"""
+        WITH knn AS (
+            SELECT embedding
+            FROM {COLLECTION_NAME}_vec
+            WHERE embedding MATCH ?
+              AND k = 1
+              AND status = 'active'
+        )
+        SELECT 1.0 - vec_distance_cosine(embedding, ?) AS similarity FROM knn
+    """, (query_blob, query_blob)).fetchone()
 
-    # Sort by score descending
-    results.sort(key=lambda x: x["score"], reverse=True)
-    return results[:top_k]
+    return row is not None and row["similarity"] >= threshold
 
 
 def delete_vector(client: sqlite3.Connection, fingerprint: str):
@@ -13,13 +13,17 @@ Usage:
 This will:
 1. Download the pretrained mobilefacenet.pt weights (~4.7 MB)
 2. Load the MobileFaceNet architecture
-3. Export to model/mobilefacenet.onnx
+3. Export to model/mobilefacenet.onnx (static batch=1, constant-folded,
+   simplified with onnxsim if installed) and model/mobilefacenet.dynamic.onnx
+   (variable batch)
 4. Validate the ONNX model
-5. Print the SHA-256 hash for version-locking
+5. Write an FP16 copy to model/mobilefacenet.fp16.onnx (needs onnxconverter-common)
+6. Print the SHA-256 hash for version-locking
 """
 
 import os
 import sys
+import mmap
 import hashlib
 import urllib.request
 import math
@@ -27,6 +31,7 @@ import math
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+from torch.nn.utils.fusion import fuse_conv_bn_eval
 
 # ============================================================================
 # MobileFaceNet Architecture (from foamliu/MobileFaceNet)
@@ -166,6 +171,34 @@ class MobileFaceNet(nn.Module):
         return x
 
 
+# Conv/BN attribute pairs outside nn.Sequential (DepthwiseSeparableConv, GDConv, MobileFaceNet head)
+_CONV_BN_ATTRS = [("depthwise", "bn1"), ("pointwise", "bn2"), ("depthwise", "bn"), ("conv3", "bn")]
+
+
+def fuse_conv_bn(model):
+    """
+    Fold every BatchNorm2d into the Conv2d that feeds it (eval mode only).
+
+    The fused conv absorbs BN's scale + shift into its weights/bias and the
+    BN is replaced with nn.Identity, so the exported graph has one op per pair.
+    """
+    for module in list(model.modules()):
+        if isinstance(module, nn.Sequential):
+            for i in range(len(module) - 1):
+                if isinstance(module[i], nn.Conv2d) and isinstance(module[i + 1], nn.BatchNorm2d):
+                    module[i] = fuse_conv_bn_eval(module[i], module[i + 1])
+                    module[i + 1] = nn.Identity()
+
+        for conv_name, bn_name in _CONV_BN_ATTRS:
+            conv = getattr(module, conv_name, None)
+            bn = getattr(module, bn_name, None)
+            if isinstance(conv, nn.Conv2d) and isinstance(bn, nn.BatchNorm2d):
+                setattr(module, conv_name, fuse_conv_bn_eval(conv, bn))
+                setattr(module, bn_name, nn.Identity())
+
+    return model
+
+
 # ============================================================================
 # Download + Convert
 # ============================================================================
@@ -175,6 +208,8 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 WEIGHTS_PATH = os.path.join(PROJECT_ROOT, "model", "mobilefacenet.pt")
 ONNX_PATH = os.path.join(PROJECT_ROOT, "model", "mobilefacenet.onnx")
+DYNAMIC_ONNX_PATH = os.path.join(PROJECT_ROOT, "model", "mobilefacenet.dynamic.onnx")
+FP16_ONNX_PATH = os.path.join(PROJECT_ROOT, "model", "mobilefacenet.fp16.onnx")
 
 
 def download_weights():
@@ -206,13 +241,39 @@ def convert_to_onnx():
     assert output.shape == (1, 128), f"❌ Unexpected output shape: {output.shape}, expected (1, 128)"
     print(f"✅ Model output shape verified: {output.shape}")
 
-    # Export to ONNX
+    # Fold BatchNorm into the preceding convs and check the embedding is unchanged
+    fuse_conv_bn(model)
+    remaining = sum(isinstance(m, nn.BatchNorm2d) for m in model.modules())
+    with torch.no_grad():
+        fused_output = model(dummy_input)
+    assert remaining == 0, f"❌ {remaining} BatchNorm layers left unfused"
+    assert torch.allclose(output, fused_output, atol=1e-4), "❌ Conv+BN fusion changed the model output"
+    print("✅ BatchNorm folded into Conv layers")
+
+    # Export to ONNX — fixed [1, 3, 112, 112] so the runtime can specialize kernels
     print(f"📦 Exporting to ONNX: {ONNX_PATH}...")
     torch.onnx.export(
         model,
         dummy_input,
         ONNX_PATH,
-        opset_version=11,
+        opset_version=17,
+        do_constant_folding=True,
+        input_names=["input"],
+        output_names=["embedding"],
+    )
+    inline_external_data(ONNX_PATH)
+    simplify_onnx(ONNX_PATH)
+
+    size_mb = os.path.getsize(ONNX_PATH) / (1024 * 1024)
+    print(f"✅ ONNX model exported: {size_mb:.1f} MB")
+
+    # Variable-batch variant for batched callers
+    torch.onnx.export(
+        model,
+        dummy_input,
+        DYNAMIC_ONNX_PATH,
+        opset_version=17,
+        do_constant_folding=True,
         input_names=["input"],
         output_names=["embedding"],
         dynamic_axes={
@@ -220,33 +281,81 @@ def convert_to_onnx():
             "embedding": {0: "batch_size"},
         },
     )
+    inline_external_data(DYNAMIC_ONNX_PATH)
+    print(f"✅ Dynamic-batch ONNX model exported: {DYNAMIC_ONNX_PATH}")
 
-    size_mb = os.path.getsize(ONNX_PATH) / (1024 * 1024)
-    print(f"✅ ONNX model exported: {size_mb:.1f} MB")
+
+def inline_external_data(path):
+    """Re-save an exported model with its weights inline and remove the `.data` sidecar."""
+    import onnx
+
+    onnx.save(onnx.load(path), path, save_as_external_data=False)
+    sidecar = path + ".data"
+    if os.path.exists(sidecar):
+        os.remove(sidecar)
+
+
+def simplify_onnx(path):
+    """Fold leftover shape/reshape chains with onnx-simplifier, if it is installed."""
+    try:
+        import onnx
+        from onnxsim import simplify
+    except ImportError:
+        print("⚠️  onnxsim not installed — skipping graph simplification")
+        return
+
+    model, ok = simplify(onnx.load(path))
+    if not ok:
+        print("⚠️  onnxsim could not validate the simplified graph — keeping the original")
+        return
+    onnx.save(model, path)
+    print(f"✅ Simplified ONNX graph: {len(model.graph.node)} nodes")
 
 
-def validate_onnx():
-    """Validate the exported ONNX model."""
+def validate_onnx(path=ONNX_PATH):
+    """Validate an exported ONNX model."""
     import onnx
-    model = onnx.load(ONNX_PATH)
+    print(f"🔍 Validating {path}...")
+    model = onnx.load(path)
     onnx.checker.check_model(model)
 
     # Print input/output info
     for inp in model.graph.input:
-        print(f"   Input:  {inp.name} — shape: {[d.dim_value for d in inp.type.tensor_type.shape.dim]}")
+        print(f"   Input:  {inp.name} — shape: {[d.dim_value or d.dim_param for d in inp.type.tensor_type.shape.dim]}")
     for out in model.graph.output:
-        print(f"   Output: {out.name} — shape: {[d.dim_value for d in out.type.tensor_type.shape.dim]}")
+        print(f"   Output: {out.name} — shape: {[d.dim_value or d.dim_param for d in out.type.tensor_type.shape.dim]}")
 
     print("✅ ONNX model validation passed")
 
 
+def export_fp16():
+    """Write an FP16 copy of the ONNX model — half the weight memory, faster on GPU/NPU runtimes."""
+    try:
+        import onnx
+        from onnxconverter_common import float16
+    except ImportError:
+        print("⚠️  onnxconverter-common not installed — skipping FP16 export")
+        return
+
+    model = onnx.load(ONNX_PATH)
+    # keep_io_types: input/embedding stay float32, so callers don't change
+    model_fp16 = float16.convert_float_to_float16(model, keep_io_types=True)
+    onnx.checker.check_model(model_fp16)
+    onnx.save(model_fp16, FP16_ONNX_PATH)
+
+    size_mb = os.path.getsize(FP16_ONNX_PATH) / (1024 * 1024)
+    print(f"✅ FP16 ONNX model exported: {FP16_ONNX_PATH} ({size_mb:.1f} MB)")
+
+
 def compute_hash():
     """Compute SHA-256 hash of the ONNX model for version-locking."""
-    sha256 = hashlib.sha256()
     with open(ONNX_PATH, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            sha256.update(chunk)
-    digest = sha256.hexdigest()
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        else:
+            # Hash the whole mapped file in one C call instead of 8 KB Python-loop reads
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                digest = hashlib.sha256(mm).hexdigest()
     print(f"🔒 Model SHA-256: {digest}")
     return digest
 
@@ -258,7 +367,9 @@ if __name__ == "__main__":
     
     download_weights()
     convert_to_onnx()
-    validate_onnx()
+    validate_onnx(ONNX_PATH)
+    validate_onnx(DYNAMIC_ONNX_PATH)
+    export_fp16()
     model_hash = compute_hash()
 
     print()
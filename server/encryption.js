@@ -4,11 +4,14 @@
  * 
  * Encrypted payload format: v{version}:{iv_hex}:{authTag_hex}:{ciphertext_hex}
  * Legacy format (v1):      {iv_hex}:{authTag_hex}:{ciphertext_hex}
+ * Matching transport frame: 'v2' | version (u8) | iv (12) | authTag (16) | ciphertext
  */
 const crypto = require('crypto');
 
 const ALGORITHM = 'aes-256-gcm';
 const IV_LENGTH = 16;
+const FRAME_MAGIC = Buffer.from('v2');
+const FRAME_IV_LENGTH = 12;
 const CURRENT_KEY_VERSION = 1;
 
 // ============================================================================
@@ -81,6 +84,34 @@ function encryptEmbedding(plaintext) {
     return `v${CURRENT_KEY_VERSION}:${iv.toString('hex')}:${authTag}:${encrypted}`;
 }
 
+/**
+ * Encrypt an embedding into a binary v2 frame for the matching service.
+ * Raw bytes (sent base64) instead of hex halve the payload and its parse cost,
+ * and the plaintext is the little-endian float32 vector rather than JSON text.
+ * @param {string} plaintext - JSON string of embedding vector
+ * @returns {Buffer} Frame: 'v2' | version | iv | authTag | ciphertext
+ */
+function encryptEmbeddingFrame(plaintext) {
+    const values = JSON.parse(plaintext);
+    const vector = Buffer.alloc(values.length * 4);
+    values.forEach((v, i) => vector.writeFloatLE(v, i * 4));
+
+    const key = getCurrentKey();
+    const iv = crypto.randomBytes(FRAME_IV_LENGTH);
+    const cipher = crypto.createCipheriv(ALGORITHM, key, iv);
+
+    const encrypted = Buffer.concat([cipher.update(vector), cipher.final()]);
+    vector.fill(0);
+
+    return Buffer.concat([
+        FRAME_MAGIC,
+        Buffer.from([CURRENT_KEY_VERSION]),
+        iv,
+        cipher.getAuthTag(),
+        encrypted,
+    ]);
+}
+
 /**
  * Decrypt an embedding string encrypted with AES-256-GCM.
  * Supports both versioned (v{n}:iv:tag:ct) and legacy (iv:tag:ct) formats.
@@ -143,6 +174,7 @@ function reEncryptWithCurrentKey(encryptedPayload) {
 
 module.exports = {
     encryptEmbedding,
+    encryptEmbeddingFrame,
     decryptEmbedding,
     reEncryptWithCurrentKey,
     CURRENT_KEY_VERSION
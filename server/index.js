@@ -8,7 +8,7 @@ const jwt = require('jsonwebtoken');
 const HashChain = require('./hashchain');
 const rateLimit = require('express-rate-limit');
 const { body, validationResult } = require('express-validator');
-const { encryptEmbedding, decryptEmbedding } = require('./encryption');
+const { encryptEmbedding, encryptEmbeddingFrame, decryptEmbedding } = require('./encryption');
 const matchingClient = require('./matching_client');
 const { Server: SocketIO } = require('socket.io');
 
@@ -158,7 +158,7 @@ app.post('/register', registerLimiter, [
         try {
             matchingResult = await matchingClient.enroll(
                 fingerprint,
-                encryptedEmbedding,
+                encryptEmbeddingFrame(embedding),
                 public_key,
                 metadata
             );
@@ -489,7 +489,7 @@ app.post('/refresh', [
 
     try {
         // Encrypt the new embedding
-        const encryptedEmbedding = encryptEmbedding(embedding);
+        const encryptedEmbedding = encryptEmbeddingFrame(embedding);
 
         if (io) io.emit('refresh:started', { fingerprint: fingerprint.slice(0, 8) + '...' });
 
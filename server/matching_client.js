@@ -13,10 +13,22 @@ const headers = {
     'X-Matching-Secret': MATCHING_SECRET,
 };
 
+/**
+ * Build the request field for an encrypted embedding.
+ * Binary v2 frames (Buffers) are sent base64; hex payloads are passed through.
+ * @param {string|Buffer} encryptedEmbedding
+ */
+function embeddingField(encryptedEmbedding) {
+    if (Buffer.isBuffer(encryptedEmbedding)) {
+        return { encrypted_embedding_b64: encryptedEmbedding.toString('base64') };
+    }
+    return { encrypted_embedding: encryptedEmbedding };
+}
+
 /**
  * Enroll an encrypted embedding in the vector database.
  * @param {string} fingerprint - 64-char hex
- * @param {string} encryptedEmbedding - AES-256-GCM payload
+ * @param {string|Buffer} encryptedEmbedding - AES-256-GCM payload (hex string or v2 frame)
  * @param {string} [userId] - Optional user ID
  * @param {object} [metadata] - Optional metadata
  * @returns {Promise<{success: boolean, fingerprint: string, vector_dim: number}>}
@@ -27,7 +39,7 @@ async function enroll(fingerprint, encryptedEmbedding, userId, metadata) {
         headers,
         body: JSON.stringify({
             fingerprint,
-            encrypted_embedding: encryptedEmbedding,
+            ...embeddingField(encryptedEmbedding),
             user_id: userId || fingerprint,
             metadata: metadata || null,
         }),
@@ -45,7 +57,7 @@ async function enroll(fingerprint, encryptedEmbedding, userId, metadata) {
 
 /**
  * Search for a matching identity.
- * @param {string} encryptedEmbedding - AES-256-GCM encrypted query embedding
+ * @param {string|Buffer} encryptedEmbedding - AES-256-GCM encrypted query embedding
  * @param {number} [threshold=0.85] - Cosine similarity threshold
  * @param {number} [topK=1] - Number of results
  * @returns {Promise<{matched: boolean, results: Array, search_time_ms: number}>}
@@ -55,7 +67,7 @@ async function search(encryptedEmbedding, threshold = 0.85, topK = 1) {
         method: 'POST',
         headers,
         body: JSON.stringify({
-            encrypted_embedding: encryptedEmbedding,
+            ...embeddingField(encryptedEmbedding),
             threshold,
             top_k: topK,
         }),
@@ -99,7 +111,7 @@ async function health() {
 /**
  * Refresh an aging embedding with a new face capture.
  * @param {string} fingerprint - 64-char hex
- * @param {string} encryptedEmbedding - AES-256-GCM encrypted new embedding
+ * @param {string|Buffer} encryptedEmbedding - AES-256-GCM encrypted new embedding
  * @returns {Promise<{success: boolean, fingerprint: string, drift_score: number, blended: boolean}>}
  */
 async function refreshEmbedding(fingerprint, encryptedEmbedding) {
@@ -108,7 +120,7 @@ async function refreshEmbedding(fingerprint, encryptedEmbedding) {
         headers,
         body: JSON.stringify({
             fingerprint,
-            encrypted_embedding: encryptedEmbedding,
+            ...embeddingField(encryptedEmbedding),
         }),
     });
 